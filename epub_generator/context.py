@@ -1,16 +1,23 @@
+from bisect import insort
 from dataclasses import dataclass
+from functools import cache, lru_cache
 from hashlib import sha256
 from importlib.resources import files
+from operator import attrgetter
+from os import fspath, stat
 from pathlib import Path
 from typing import cast
-from zipfile import ZipFile
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
 
 from jinja2 import Environment
 from jinja2 import Template as JinjaTemplate
+from jinja2.environment import TemplateStream
 
 from .options import LaTeXRender, TableRender
 from .template import create_env
 
+_HASH_CHUNK_SIZE = 1024 * 1024
+
 
 @dataclass
 class _AssetNode:
@@ -30,9 +37,9 @@ class Context:
         self._template: Template = template
         self._table_render: TableRender = table_render
         self._latex_render: LaTeXRender = latex_render
-        self._path_to_node: dict[Path, _AssetNode] = {}  # source_path -> node
+        self._path_to_node: dict[str, _AssetNode] = {}  # source_path -> node
         self._hash_to_node: dict[str, _AssetNode] = {}  # content_hash -> node
-        self._chapters_with_mathml: set[str] = set()  # Track chapters containing MathML
+        self._sorted_nodes: list[_AssetNode] = []  # kept sorted by file_name
 
     @property
     def file(self) -> ZipFile:
@@ -52,16 +59,8 @@ class Context:
 
     @property
     def used_files(self) -> list[tuple[str, str]]:
-        nodes = list(self._hash_to_node.values())
-        nodes.sort(key=lambda node: node.file_name)
-        return [(node.file_name, node.media_type) for node in nodes]
+        return [(node.file_name, node.media_type) for node in self._sorted_nodes]
     
-    @property
-    def chapters_with_mathml(self) -> set[str]:
-        return self._chapters_with_mathml
-
-    def mark_chapter_has_mathml(self, chapter_file_name: str) -> None:
-        self._chapters_with_mathml.add(chapter_file_name)
 
     def use_asset(
         self,
@@ -69,19 +68,20 @@ class Context:
         media_type: str,
         file_ext: str,
     ) -> str:
-        if source_path in self._path_to_node:
-            return self._path_to_node[source_path].file_name
-
-        if not source_path.exists():
-            raise FileNotFoundError(f"Asset file not found: {source_path}")
+        # plain str keys and arguments, Path objects are only kept at the API boundary
+        path = fspath(source_path)
+        node = self._path_to_node.get(path)
+        if node is not None:
+            return node.file_name
 
-        with open(source_path, "rb") as f:
-            content = f.read()
-        content_hash = _sha256_hash(content)
+        try:
+            content_hash = _sha256_file_hash(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Asset file not found: {source_path}") from None
 
-        if content_hash in self._hash_to_node:
-            node = self._hash_to_node[content_hash]
-            self._path_to_node[source_path] = node
+        node = self._hash_to_node.get(content_hash)
+        if node is not None:
+            self._path_to_node[path] = node
             return node.file_name
 
         file_name = f"{content_hash}{file_ext}"
@@ -90,18 +90,21 @@ class Context:
             media_type=media_type,
             content_hash=content_hash,
         )
-        self._path_to_node[source_path] = node
+        self._path_to_node[path] = node
         self._hash_to_node[content_hash] = node
+        insort(self._sorted_nodes, node, key=attrgetter("file_name"))
         self._file.write(
-            filename=source_path,
+            filename=path,
             arcname="OEBPS/assets/" + file_name,
+            compress_type=compress_type_of(media_type),
         )
         return file_name
 
     def add_asset(self, data: bytes, media_type: str, file_ext: str) -> str:
         content_hash = _sha256_hash(data)
-        if content_hash in self._hash_to_node:
-            return self._hash_to_node[content_hash].file_name
+        node = self._hash_to_node.get(content_hash)
+        if node is not None:
+            return node.file_name
 
         file_name = f"{content_hash}{file_ext}"
         node = _AssetNode(
@@ -110,29 +113,62 @@ class Context:
             content_hash=content_hash,
         )
         self._hash_to_node[content_hash] = node
+        insort(self._sorted_nodes, node, key=attrgetter("file_name"))
 
         self._file.writestr(
             zinfo_or_arcname="OEBPS/assets/" + file_name,
             data=data,
+            compress_type=compress_type_of(media_type),
         )
         return file_name
 
 class Template:
     def __init__(self):
-        templates_path = cast(Path, files("epub_generator")) / "data"
-        self._env: Environment = create_env(templates_path)
-        self._templates: dict[str, JinjaTemplate] = {}
+        self._env: Environment = _get_env()
+
+    def get(self, template: str) -> JinjaTemplate:
+        return self._env.get_template(template)
 
     def render(self, template: str, **params) -> str:
-        jinja_template: JinjaTemplate = self._template(template)
-        return jinja_template.render(**params)
-
-    def _template(self, name: str) -> JinjaTemplate:
-        template = self._templates.get(name, None)
-        if template is None:
-            template = self._env.get_template(name)
-            self._templates[name] = template
-        return template
+        return self.get(template).render(**params)
+
+    def stream(self, template: str, **params) -> TemplateStream:
+        return self.get(template).stream(**params)
+
+    def render_static(self, template: str) -> bytes:
+        """Render a template that takes no parameters, output is cached per process."""
+        return _render_static(template)
+
+
+@cache
+def _get_env() -> Environment:
+    # shared by all generations, so every template is compiled only once per process
+    templates_path = cast(Path, files("epub_generator")) / "data"
+    return create_env(templates_path)
+
+@cache
+def _render_static(template: str) -> bytes:
+    return _get_env().get_template(template).render().encode("utf-8")
+
+def compress_type_of(media_type: str) -> int:
+    # raster images and media are already compressed, deflating them again only burns CPU
+    if media_type != "image/svg+xml" and media_type.startswith(("image/", "audio/", "video/", "font/")):
+        return ZIP_STORED
+    return ZIP_DEFLATED
+
+def _sha256_file_hash(path: str) -> str:
+    # mtime and size are part of the key, so a modified file is hashed again
+    stat_result = stat(path)
+    return _cached_sha256_file_hash(path, stat_result.st_mtime_ns, stat_result.st_size)
+
+@lru_cache(maxsize=4096)
+def _cached_sha256_file_hash(path: str, mtime_ns: int, size: int) -> str: # pylint: disable=unused-argument
+    # hash in fixed-size chunks instead of loading the whole file into memory
+    hash256 = sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            hash256.update(chunk)
+    return hash256.hexdigest()
 
 def _sha256_hash(data: bytes) -> str:
     hash256 = sha256()
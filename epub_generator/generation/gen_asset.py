@@ -1,10 +1,8 @@
 import io
-import re
-from typing import Any, cast
-from xml.etree.ElementTree import Element, fromstring
-
-import matplotlib.pyplot as plt
-from latex2mathml.converter import convert
+from functools import cache, lru_cache
+from threading import Lock
+from typing import Any, Callable, cast
+from xml.etree.ElementTree import Element, SubElement, fromstring
 
 from ..context import Context
 from ..options import LaTeXRender, TableRender
@@ -19,6 +17,13 @@ _MEDIA_TYPE_MAP = {
     ".svg": "image/svg+xml",
 }
 
+# Element 会复制传入的 attrib，常量字典可安全复用
+_FORMULA_INLINE_ATTRIB = {"class": "formula-inline"}
+_ALT_WRAPPER_ATTRIB = {"class": "alt-wrapper"}
+_ASSET_ATTRIB = {"class": "asset"}
+_ASSET_TITLE_ATTRIB = {"class": "asset-title"}
+_ASSET_CAPTION_ATTRIB = {"class": "asset-caption"}
+
 
 def render_inline_formula(context: Context, formula: Formula) -> Element | None:
     return _render_formula(
@@ -29,14 +34,10 @@ def render_inline_formula(context: Context, formula: Formula) -> Element | None:
 
 
 def render_asset_block(context: Context, block: Table | Formula | Image) -> Element | None: 
-    element: Element | None = None
-    if isinstance(block, Table):
-        element = _render_table(context, block)
-    elif isinstance(block, Formula):
-        element = _render_formula(context, block, inline_mode=False)
-    elif isinstance(block, Image):
-        element = _process_image(context, block)
-    return element
+    renderer = _find_asset_renderer(type(block))
+    if renderer is None:
+        return None
+    return renderer(context, block)
 
 
 def _render_table(context: Context, table: Table) -> Element | None:
@@ -94,6 +95,10 @@ def _render_formula(
     )
 
 
+def _render_block_formula(context: Context, formula: Formula) -> Element | None:
+    return _render_formula(context, formula, inline_mode=False)
+
+
 def _process_image(context: Context, image: Image) -> Element:
     file_ext = image.path.suffix or ".png"
     file_name = context.use_asset(
@@ -117,10 +122,20 @@ def _normalize_expression(expression: str) -> str:
     return expression
 
 
-_ESCAPE_UNICODE_PATTERN = re.compile(r"&#x([0-9A-Fa-f]{5});")
+def _latex2mathml(latex: str, inline_mode: bool) -> None | Element:
+    mathml = _latex2mathml_string(latex, inline_mode)
+    if mathml is None:
+        return None
+    try:
+        return fromstring(mathml)
+    except Exception:
+        return None
 
 
-def _latex2mathml(latex: str, inline_mode: bool) -> None | Element:
+# 同一公式在书中常反复出现，缓存转换后的字符串（而非可变的 Element）
+@lru_cache(maxsize=1024)
+def _latex2mathml_string(latex: str, inline_mode: bool) -> str | None:
+    from latex2mathml.converter import convert  # 仅在渲染公式时才需要，延迟导入
     try:
         html_latex = convert(
             latex=latex,
@@ -129,52 +144,61 @@ def _latex2mathml(latex: str, inline_mode: bool) -> None | Element:
     except Exception:
         return None
 
-    # latex2mathml 转义会带上一个奇怪的 `&` 前缀，这显然是多余的
-    # 不得已，在这里用正则表达式处理以修正这个错误
-    def repl(match):
-        hex_code = match.group(1)
-        char = chr(int(hex_code, 16))
-        if char == "<":
-            return "&lt;"
-        elif char == ">":
-            return "&gt;"
-        else:
-            return char
-
-    mathml = re.sub(
-        pattern=_ESCAPE_UNICODE_PATTERN,
-        repl=repl,
-        string=html_latex,
-    )
-    try:
-        return fromstring(mathml)
-    except Exception:
-        return None
+    # latex2mathml 输出的是标准的数字字符引用（如 `&#x1D49C;`），
+    # fromstring 解析时会原样解码，无需预先处理
+    return html_latex
 
 
+_SVG_FIGURE_LOCK = Lock()
+
+
+@lru_cache(maxsize=256)
 def _latex_formula2svg(latex: str, font_size: int = 12):
     # from https://www.cnblogs.com/qizhou/p/18170083
-    try:
-        output = io.BytesIO()
-        plt.rc("text", usetex=True)
-        plt.rc("font", size=font_size)
-        fig, ax = plt.subplots()
-        txt = ax.text(0.5, 0.5, f"${latex}$", ha="center", va="center", transform=ax.transAxes)
-        ax.axis("off")
-        fig.canvas.draw()
-        bbox = txt.get_window_extent(cast(Any, fig.canvas).get_renderer())
-        fig.set_size_inches(bbox.width / fig.dpi, bbox.height / fig.dpi)
-        plt.savefig(
-            output,
-            format="svg",
-            transparent=True,
-            bbox_inches="tight",
-            pad_inches=0,
-        )
-        return output.getvalue()
-    except Exception:
-        return None
-    
+    # 复用同一个 Figure，避免每个公式都重新创建 Figure/Axes/Canvas
+    with _SVG_FIGURE_LOCK:
+        fig, ax, default_size = _get_svg_figure()
+        txt = None
+        try:
+            output = io.BytesIO()
+            fig.set_size_inches(default_size)
+            txt = ax.text(
+                0.5, 0.5, f"${latex}$",
+                ha="center", va="center",
+                fontsize=font_size, usetex=True,
+                transform=ax.transAxes,
+            )
+            fig.canvas.draw()
+            bbox = txt.get_window_extent(cast(Any, fig.canvas).get_renderer())
+            fig.set_size_inches(bbox.width / fig.dpi, bbox.height / fig.dpi)
+            fig.savefig(
+                output,
+                format="svg",
+                transparent=True,
+                bbox_inches="tight",
+                pad_inches=0,
+            )
+            return output.getvalue()
+        except Exception:
+            return None
+        finally:
+            if txt is not None:
+                txt.remove()
+
+
+@cache
+def _get_svg_figure():
+    # 导入开销很大，仅在渲染 SVG 公式时才加载
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    # 不经过 pyplot 创建，宿主进程里的 plt.plot() 等调用不会画到这个 Figure 上
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.axis("off")
+    return fig, ax, fig.get_size_inches().copy()
+
 
 def _wrap_asset_content(
     context: Context,
@@ -184,25 +208,40 @@ def _wrap_asset_content(
 ) -> Element:
     
     if inline_mode:
-        wrapper = Element("span", attrib={"class": "formula-inline"})
+        wrapper = Element("span", _FORMULA_INLINE_ATTRIB)
     else:
-        wrapper = Element("div", attrib={"class": "alt-wrapper"})
+        wrapper = Element("div", _ALT_WRAPPER_ATTRIB)
 
     wrapper.append(content_element)
 
     if not asset.title and not asset.caption:
         return wrapper
 
-    container = Element("div", attrib={"class": "asset"})
+    container = Element("div", _ASSET_ATTRIB)
     if asset.title:
-        title_div = Element("div", attrib={"class": "asset-title"})
+        title_div = SubElement(container, "div", _ASSET_TITLE_ATTRIB)
         render_inline_content(context, title_div, asset.title)
-        container.append(title_div)
 
     container.append(wrapper)
     if asset.caption:
-        caption_div = Element("div", attrib={"class": "asset-caption"})
+        caption_div = SubElement(container, "div", _ASSET_CAPTION_ATTRIB)
         render_inline_content(context, caption_div, asset.caption)
-        container.append(caption_div)
 
     return container
+
+
+_ASSET_RENDERERS: dict[type, Callable[[Context, Any], Element | None]] = {
+    Table: _render_table,
+    Formula: _render_block_formula,
+    Image: _process_image,
+}
+
+
+@cache
+def _find_asset_renderer(block_type: type) -> Callable[[Context, Any], Element | None] | None:
+    # Subclassed assets resolve to the renderer of their nearest base type
+    for base in block_type.__mro__:
+        renderer = _ASSET_RENDERERS.get(base)
+        if renderer is not None:
+            return renderer
+    return None
@@ -1,5 +1,10 @@
-from typing import Generator
-from xml.etree.ElementTree import Element
+from dataclasses import dataclass
+from functools import cache
+from io import StringIO
+from typing import Any, Callable, Generator
+
+from jinja2 import Template as JinjaTemplate
+from jinja2.environment import TemplateStream
 
 from ..context import Context
 from ..i18n import I18N
@@ -13,108 +18,117 @@ from ..types import (
     TextKind,
 )
 from .gen_asset import render_asset_block
-from .gen_content import render_inline_content
-from .xml_utils import serialize_element, set_epub_type
+from .gen_content import write_inline_content
+from .xml_utils import contains_mathml, serialize_element
 
 _MAX_HEADING_LEVEL = 6 # HTML standard defines heading levels from h1 to h6
+_BACK_REF_TEMPLATE = '<a href="#ref-{0}">[{0}]</a>'.format
+
+
+@dataclass
+class ChapterRenderResult:
+    xhtml: TemplateStream
+    has_mathml: bool
 
 
 def generate_chapter(
     context: Context,
     chapter: Chapter,
     i18n: I18N,
-) -> str:
-    return context.template.render(
-        template="part.xhtml",
-        i18n=i18n,
-        content=[
-            serialize_element(child)
-            for child in _render_contents(context, chapter)
-        ],
-        citations=[
-            serialize_element(child)
-            for child in _render_footnotes(context, chapter)
-        ],
+    part_template: JinjaTemplate,
+) -> ChapterRenderResult:
+    # content is rendered eagerly: assets used by the chapter are written into
+    # the same zip file, which must happen before the chapter entry is opened
+    content = _render_contents(context, chapter)
+    citations = list(_render_footnotes(context, chapter))
+    return ChapterRenderResult(
+        xhtml=part_template.stream(
+            i18n=i18n,
+            content=content,
+            citations=citations,
+        ),
+        has_mathml=(
+            contains_mathml(content) or
+            any(contains_mathml(citation) for citation in citations)
+        ),
     )
 
-def _render_contents(
-    context: Context,
-    chapter: Chapter,
-) -> Generator[Element, None, None]:
+def _render_contents(context: Context, chapter: Chapter) -> str:
+    buffer = StringIO()
     for block in chapter.elements:
-        layout = _render_content_block(context, block)
-        if layout is not None:
-            yield layout
+        _write_content_block(context, buffer, block)
+    return buffer.getvalue()
 
-def _render_footnotes(
-    context: Context,
-    chapter: Chapter,
-) -> Generator[Element, None, None]:
+def _render_footnotes(context: Context, chapter: Chapter) -> Generator[str, None, None]:
     for footnote in chapter.footnotes:
         if not footnote.has_mark or not footnote.contents:
             continue
 
-        # Use <aside> with EPUB 3.0 semantic attributes
-        citation_aside = Element("aside")
-        citation_aside.attrib = {
-            "id": f"fn-{footnote.id}",
-            "class": "footnote",
-        }
-        set_epub_type(citation_aside, "footnote")
-
+        buffer = StringIO()
         for block in footnote.contents:
-            layout = _render_content_block(context, block)
-            if layout is not None:
-                citation_aside.append(layout)
-
-        if len(citation_aside) == 0:
+            _write_content_block(context, buffer, block)
+        body = buffer.getvalue()
+        if not body:
             continue
 
-        # Back-reference link with EPUB 3.0 attributes
-        ref = Element("a")
-        ref.text = f"[{footnote.id}]"
-        ref.attrib = {
-            "href": f"#ref-{footnote.id}",
-        }
-        first_layout = citation_aside[0]
-        if first_layout.tag == "p":
-            ref.tail = first_layout.text
-            first_layout.text = None
-            first_layout.insert(0, ref)
+        # Back-reference link goes into the first paragraph, or a paragraph of its own
+        back_ref = _BACK_REF_TEMPLATE(footnote.id)
+        if body.startswith("<p>"):
+            body = f"<p>{back_ref}{body[3:]}"
         else:
-            inject_p = Element("p")
-            inject_p.append(ref)
-            citation_aside.insert(0, inject_p)
+            body = f"<p>{back_ref}</p>{body}"
 
-        yield citation_aside
+        # Use <aside> with EPUB 3.0 semantic attributes
+        yield f'<aside id="fn-{footnote.id}" class="footnote" epub:type="footnote">{body}</aside>'
 
 
-def _render_content_block(context: Context, block: ContentBlock) -> Element | None:
-    if isinstance(block, Table | Formula | Image):
-        return render_asset_block(context, block)
+def _write_content_block(context: Context, buffer: StringIO, block: ContentBlock) -> None:
+    writer = _find_block_writer(type(block))
+    if writer is not None:
+        writer(context, buffer, block)
 
-    elif isinstance(block, TextBlock):
-        if block.kind == TextKind.HEADLINE:
-            heading_level = min(block.level + 1, _MAX_HEADING_LEVEL)
-            container = Element(f"h{heading_level}")
-        elif block.kind == TextKind.QUOTE:
-            container = Element("p")
-        elif block.kind == TextKind.BODY:
-            container = Element("p")
-        else:
-            raise ValueError(f"Unknown TextKind: {block.kind}")
-
-        render_inline_content(
-            context=context,
-            parent=container,
-            content=block.content,
-        )
-        if block.kind == TextKind.QUOTE:
-            blockquote = Element("blockquote")
-            blockquote.append(container)
-            return blockquote
-
-        return container
-    
+
+def _write_asset_block(context: Context, buffer: StringIO, block: Table | Formula | Image) -> None:
+    element = render_asset_block(context, block)
+    if element is not None:
+        buffer.write(serialize_element(element))
+        buffer.write("\n")
+
+
+def _write_text_block(context: Context, buffer: StringIO, block: TextBlock) -> None:
+    # Text blocks are the bulk of most books, so they are written as strings
+    # directly instead of building an Element tree only to serialize it again
+    if block.kind == TextKind.HEADLINE:
+        tag_name = f"h{min(block.level + 1, _MAX_HEADING_LEVEL)}"
+    elif block.kind in (TextKind.BODY, TextKind.QUOTE):
+        tag_name = "p"
     else:
-        return None
+        raise ValueError(f"Unknown TextKind: {block.kind}")
+
+    if block.kind == TextKind.QUOTE:
+        buffer.write("<blockquote>")
+    buffer.write(f"<{tag_name}>")
+    write_inline_content(context, buffer, block.content)
+    buffer.write(f"</{tag_name}>")
+    if block.kind == TextKind.QUOTE:
+        buffer.write("</blockquote>")
+    buffer.write("\n")
+
+
+# keyed by type, _find_block_writer resolves subclasses through the MRO and caches the result
+_BLOCK_WRITERS: dict[type, Callable[[Context, StringIO, Any], None]] = {
+    TextBlock: _write_text_block,
+    Table: _write_asset_block,
+    Formula: _write_asset_block,
+    Image: _write_asset_block,
+}
+
+
+@cache
+def _find_block_writer(block_type: type) -> Callable[[Context, StringIO, Any], None] | None:
+    # Subclassed blocks resolve to the writer of their nearest base type
+    for base in block_type.__mro__:
+        writer = _BLOCK_WRITERS.get(base)
+        if writer is not None:
+            return writer
+    return None
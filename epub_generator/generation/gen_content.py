@@ -1,8 +1,17 @@
-from xml.etree.ElementTree import Element
+from io import StringIO
+from typing import Iterator
+from xml.etree.ElementTree import Element, SubElement
+from xml.sax.saxutils import escape
 
 from ..context import Context
 from ..types import Formula, HTMLTag, Mark
-from .xml_utils import set_epub_type
+from .xml_utils import serialize_element, set_epub_type
+
+# EPUB 3.0 noteref, same markup as the Mark branch of render_inline_content
+_NOTEREF_TEMPLATE = '<a id="ref-{0}" href="#fn-{0}" class="super" epub:type="noteref">[{0}]</a>'.format
+
+# end-of-iterator sentinel, None cannot be used since stray None items are skipped, not treated as the end
+_END = object()
 
 
 def render_inline_content(
@@ -10,50 +19,74 @@ def render_inline_content(
     parent: Element,
     content: list[str | Mark | Formula | HTMLTag]
 ) -> None:
-    current_element = parent
-    for item in content:
-        if isinstance(item, str):
-            if current_element is parent:
-                if parent.text is None:
-                    parent.text = item
-                else:
-                    parent.text += item
-            else:
-                if current_element.tail is None:
-                    current_element.tail = item
-                else:
-                    current_element.tail += item
+    # nested HTMLTag are walked with an explicit stack instead of recursing
+    stack: list[tuple[Element, Iterator[str | Mark | Formula | HTMLTag]]] = [
+        (parent, iter(content)),
+    ]
+    while stack:
+        element, items = stack[-1]
+        item = next(items, _END)
+        if item is _END:
+            stack.pop()
+
+        elif isinstance(item, str):
+            _append_text(element, item)
 
         elif isinstance(item, HTMLTag):
-            tag_element = render_html_tag(context, item)
-            parent.append(tag_element)
-            current_element = tag_element
+            tag_element = SubElement(element, item.name, dict(item.attributes))
+            stack.append((tag_element, iter(item.content)))
 
         elif isinstance(item, Formula):
             from .gen_asset import render_inline_formula  # avoid circular import
             formula_element = render_inline_formula(context, item)
             if formula_element is not None:
-                parent.append(formula_element)
-                current_element = formula_element
+                element.append(formula_element)
 
         elif isinstance(item, Mark):
             # EPUB 3.0 noteref with semantic attributes
-            anchor = Element("a")
-            anchor.attrib = {
+            anchor = SubElement(element, "a", {
                 "id": f"ref-{item.id}",
                 "href": f"#fn-{item.id}",
                 "class": "super",
-            }
+            })
             set_epub_type(anchor, "noteref")
             anchor.text = f"[{item.id}]"
-            parent.append(anchor)
-            current_element = anchor
+
+
+def write_inline_content(
+    context: Context,
+    buffer: StringIO,
+    content: list[str | Mark | Formula | HTMLTag]
+) -> None:
+    """Write inline content as XHTML string, same output as render_inline_content."""
+    for item in content:
+        if isinstance(item, str):
+            buffer.write(escape(item))
+
+        elif isinstance(item, HTMLTag):
+            buffer.write(serialize_element(render_html_tag(context, item)))
+
+        elif isinstance(item, Formula):
+            from .gen_asset import render_inline_formula  # avoid circular import
+            formula_element = render_inline_formula(context, item)
+            if formula_element is not None:
+                buffer.write(serialize_element(formula_element))
+
+        elif isinstance(item, Mark):
+            buffer.write(_NOTEREF_TEMPLATE(item.id))
 
 
 def render_html_tag(context: Context, tag: HTMLTag) -> Element:
     """Convert HTMLTag to XML Element with full inline content support."""
-    element = Element(tag.name)
-    for attr, value in tag.attributes:
-        element.set(attr, value)
+    element = Element(tag.name, dict(tag.attributes))
     render_inline_content(context, element, tag.content)
-    return element
\ No newline at end of file
+    return element
+
+
+def _append_text(element: Element, text: str) -> None:
+    # text after a child element belongs to that child's tail
+    if len(element):
+        last_child = element[-1]
+        last_child.tail = text if last_child.tail is None else last_child.tail + text
+    else:
+        element.text = text if element.text is None else element.text + text
@@ -3,17 +3,18 @@ from os import PathLike
 from pathlib import Path
 from typing import Callable, Literal
 from uuid import uuid4
-from zipfile import ZipFile
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
 
-from ..context import Context, Template
-from ..html_tag import search_content
+from ..context import Context, Template, compress_type_of
 from ..i18n import I18N
 from ..options import LaTeXRender, TableRender
-from ..types import BasicAsset, Chapter, ContentBlock, EpubData, Formula, TextBlock
+from ..types import EpubData
 from ..validate import validate_chapter, validate_epub_data
 from .gen_chapter import generate_chapter
 from .gen_nav import gen_nav
-from .gen_toc import TocPoint, gen_toc, iter_toc
+from .gen_toc import TocPointRef, gen_toc, iter_toc
+
+_OUTPUT_BUFFER_SIZE = 1024 * 1024
 
 
 def generate_epub(
@@ -32,10 +33,14 @@ def generate_epub(
     epub_file_path = Path(epub_file_path)
     has_cover = epub_data.cover_image_path is not None
     toc_points = gen_toc(epub_data=epub_data)
+    toc_refs = list(iter_toc(toc_points))
 
     epub_file_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with ZipFile(epub_file_path, "w") as file:
+    with (
+        open(epub_file_path, "wb", buffering=_OUTPUT_BUFFER_SIZE) as output,
+        ZipFile(output, "w", compression=ZIP_DEFLATED, compresslevel=1) as file,
+    ):
         context = Context(
             file=file,
             template=template,
@@ -44,16 +49,16 @@ def generate_epub(
         )
         file.writestr(
             zinfo_or_arcname="mimetype",
-            data=template.render("mimetype").encode("utf-8"),
+            data=template.render_static("mimetype"),
+            compress_type=ZIP_STORED,  # required by the EPUB OCF spec
         )
         assert_not_aborted()
 
-        _write_chapters_from_data(
+        chapters_with_mathml = _write_chapters_from_data(
             context=context,
             i18n=i18n,
-            toc_points=toc_points,
+            toc_refs=toc_refs,
             epub_data=epub_data,
-            latex_render=latex_render,
             assert_not_aborted=assert_not_aborted,
         )
         nav_xhtml = gen_nav(
@@ -63,17 +68,16 @@ def generate_epub(
             toc_points=toc_points,
             has_cover=has_cover,
         )
-        file.writestr(
-            zinfo_or_arcname="OEBPS/nav.xhtml",
-            data=nav_xhtml.encode("utf-8"),
-        )
+        with file.open("OEBPS/nav.xhtml", "w") as nav_output:
+            nav_xhtml.dump(nav_output, encoding="utf-8")
         assert_not_aborted()
 
         _write_basic_files(
             context=context,
             i18n=i18n,
             epub_data=epub_data,
-            toc_points=toc_points,
+            toc_refs=toc_refs,
+            chapters_with_mathml=chapters_with_mathml,
         )
         assert_not_aborted()
 
@@ -91,85 +95,58 @@ def _write_assets_from_data(
 ):
     context.file.writestr(
         zinfo_or_arcname="OEBPS/styles/style.css",
-        data=context.template.render("style.css").encode("utf-8"),
+        data=context.template.render_static("style.css"),
     )
     if epub_data.cover_image_path:
-        context.file.writestr(
-            zinfo_or_arcname="OEBPS/Text/cover.xhtml",
-            data=context.template.render(
-                template="cover.xhtml",
-                i18n=i18n,
-            ).encode("utf-8"),
+        cover_xhtml = context.template.stream(
+            template="cover.xhtml",
+            i18n=i18n,
         )
+        with context.file.open("OEBPS/Text/cover.xhtml", "w") as output:
+            cover_xhtml.dump(output, encoding="utf-8")
         if epub_data.cover_image_path:
             context.file.write(
                 filename=epub_data.cover_image_path,
                 arcname="OEBPS/assets/cover.png",
+                compress_type=compress_type_of("image/png"),
             )
 
 
 def _write_chapters_from_data(
     context: Context,
     i18n: I18N,
-    toc_points: list[TocPoint],
+    toc_refs: list[TocPointRef],
     epub_data: EpubData,
-    latex_render: LaTeXRender,
     assert_not_aborted: Callable[[], None],
-):
-    for file_name, get_chapter in _search_chapters(epub_data, toc_points):
+) -> set[str]:
+    chapters_with_mathml: set[str] = set()
+    part_template = context.template.get("part.xhtml")
+    for file_name, get_chapter in _search_chapters(epub_data, toc_refs):
         chapter = get_chapter()
         # Validate chapter content for invalid Unicode characters
         validate_chapter(chapter, context=f"Chapter '{file_name}'")
-        data = generate_chapter(context, chapter, i18n)
-        context.file.writestr(
-            zinfo_or_arcname="OEBPS/Text/" + file_name,
-            data=data.encode("utf-8"),
-        )
-        if latex_render == LaTeXRender.MATHML and _chapter_has_formula(chapter):
-            context.mark_chapter_has_mathml(file_name)
+        result = generate_chapter(context, chapter, i18n, part_template)
+        with context.file.open("OEBPS/Text/" + file_name, "w") as output:
+            result.xhtml.dump(output, encoding="utf-8")
+        if result.has_mathml:
+            chapters_with_mathml.add(file_name)
         assert_not_aborted()
+    return chapters_with_mathml
 
 
-def _search_chapters(epub_data: EpubData, toc_points: list[TocPoint]):
+def _search_chapters(epub_data: EpubData, toc_refs: list[TocPointRef]):
     if epub_data.get_head is not None:
         yield "head.xhtml", epub_data.get_head
-    for ref in iter_toc(toc_points):
+    for ref in toc_refs:
         yield ref.file_name, ref.get_chapter
 
 
-def _chapter_has_formula(chapter: Chapter) -> bool:
-    for element in chapter.elements:
-        if _content_block_has_formula(element):
-            return True
-    for footnote in chapter.footnotes:
-        for content_block in footnote.contents:
-            if _content_block_has_formula(content_block):
-                return True
-    return False
-
-
-def _content_block_has_formula(content_block: ContentBlock) -> bool:
-    if isinstance(content_block, Formula):
-        return True
-    if isinstance(content_block, TextBlock):
-        for item in search_content(content_block.content):
-            if isinstance(item, Formula):
-                return True
-    if isinstance(content_block, BasicAsset):
-        for item in search_content(content_block.title):
-            if isinstance(item, Formula):
-                return True
-        for item in search_content(content_block.caption):
-            if isinstance(item, Formula):
-                return True
-    return False
-
-
 def _write_basic_files(
     context: Context,
     i18n: I18N,
     epub_data: EpubData,
-    toc_points: list[TocPoint],
+    toc_refs: list[TocPointRef],
+    chapters_with_mathml: set[str],
 ):
     meta = epub_data.meta
     has_cover = epub_data.cover_image_path is not None
@@ -177,7 +154,7 @@ def _write_basic_files(
 
     context.file.writestr(
         zinfo_or_arcname="META-INF/container.xml",
-        data=context.template.render("container.xml").encode("utf-8"),
+        data=context.template.render_static("container.xml"),
     )
     isbn = (meta.isbn if meta else None) or str(uuid4())
     if meta and meta.modified:
@@ -185,8 +162,7 @@ def _write_basic_files(
     else:
         modified_timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
-    toc_refs = list(iter_toc(toc_points))
-    content = context.template.render(
+    content = context.template.stream(
         template="content.opf",
         meta=meta,
         i18n=i18n,
@@ -196,9 +172,7 @@ def _write_basic_files(
         has_head_chapter=has_head_chapter,
         has_cover=has_cover,
         asset_files=context.used_files,
-        chapters_with_mathml=context.chapters_with_mathml,
-    )
-    context.file.writestr(
-        zinfo_or_arcname="OEBPS/content.opf",
-        data=content.encode("utf-8"),
+        chapters_with_mathml=chapters_with_mathml,
     )
+    with context.file.open("OEBPS/content.opf", "w") as output:
+        content.dump(output, encoding="utf-8")
@@ -1,10 +1,11 @@
-from xml.etree.ElementTree import Element
+from xml.sax.saxutils import escape
+
+from jinja2.environment import TemplateStream
 
 from ..context import Template
 from ..i18n import I18N
 from ..types import BookMeta, EpubData
 from .gen_toc import TocPoint, iter_toc
-from .xml_utils import indent, serialize_element
 
 
 def gen_nav(
@@ -13,10 +14,10 @@ def gen_nav(
     epub_data: EpubData,
     toc_points: list[TocPoint],
     has_cover: bool = False,
-) -> str:
+) -> TemplateStream:
     meta: BookMeta | None = epub_data.meta
     has_head_chapter = epub_data.get_head is not None
-    toc_body = "\n".join(_render_toc_item(toc_points))
+    toc_body = _render_toc_body(toc_points)
     first_ref = next(iter_toc(toc_points), None)
 
     first_chapter_file: str = ""
@@ -26,7 +27,7 @@ def gen_nav(
     if has_head_chapter and epub_data.get_head:
         head_chapter_title = i18n.preface
 
-    return template.render(
+    return template.stream(
         template="nav.xhtml",
         i18n=i18n,
         meta=meta,
@@ -38,33 +39,25 @@ def gen_nav(
     )
 
 
-def _render_toc_item(toc_points: list[TocPoint]):
+def _render_toc_body(toc_points: list[TocPoint]) -> str:
+    lines: list[str] = []
     for toc_point in toc_points:
-        element = _create_toc_li_element(toc_point)
-        element = indent(element)
-        yield serialize_element(element)
-
+        _write_toc_point(lines, toc_point, "")
+    return "\n".join(lines)
 
-def _create_toc_li_element(toc_point: TocPoint) -> Element:
-    li = Element("li")
 
+def _write_toc_point(lines: list[str], toc_point: TocPoint, indent: str) -> None:
+    lines.append(f"{indent}<li>")
+    title = escape(toc_point.title)
     if toc_point.ref is not None:
-        file_name = toc_point.ref.file_name
-        link = Element("a")
-        link.set("href", f"Text/{file_name}")
-        link.text = toc_point.title
-        li.append(link)
+        lines.append(f'{indent}  <a href="Text/{toc_point.ref.file_name}">{title}</a>')
     else:
-        span = Element("span")
-        span.text = toc_point.title
-        li.append(span)
+        lines.append(f"{indent}  <span>{title}</span>")
 
     # 递归处理子节点
     if toc_point.children:
-        ol = Element("ol")
+        lines.append(f"{indent}  <ol>")
         for child in toc_point.children:
-            child_li = _create_toc_li_element(child)
-            ol.append(child_li)
-        li.append(ol)
-
-    return li
+            _write_toc_point(lines, child, indent + "    ")
+        lines.append(f"{indent}  </ol>")
+    lines.append(f"{indent}</li>")
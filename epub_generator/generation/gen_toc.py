@@ -4,7 +4,7 @@ from typing import Any, Callable, Generator
 from ..types import EpubData, TocItem
 
 
-@dataclass
+@dataclass(slots=True)
 class TocPoint:
     title: str
     order: int
@@ -21,85 +21,75 @@ class TocPoint:
         """是否有对应的 XHTML 文件"""
         return self.ref is not None
 
-@dataclass
+@dataclass(slots=True)
 class TocPointRef:
-    part_id: str
     file_name: str
     get_chapter: Callable[[], Any]
 
 
 def iter_toc(toc_points: list[TocPoint]) -> Generator[TocPointRef, None, None]:
-    for toc_point in toc_points:
+    stack = list(reversed(toc_points))
+    while stack:
+        toc_point = stack.pop()
         if toc_point.ref:
             yield toc_point.ref
-        yield from iter_toc(toc_point.children)
+        stack.extend(reversed(toc_point.children))
 
 
 def gen_toc(epub_data: EpubData) -> list[TocPoint]:
     prefaces = epub_data.prefaces
     chapters = epub_data.chapters
 
-    toc_point_generation = _TocPointGenerator(
-        chapters_count=(
-            _count_toc_items(prefaces) +
-            _count_toc_items(chapters)
-        ),
-    )
+    toc_point_generation = _TocPointGenerator()
     toc_points: list[TocPoint] = []
     for chapters_list in (prefaces, chapters):
         for toc_item in chapters_list:
             toc_point = toc_point_generation.generate(toc_item)
             toc_points.append(toc_point)
 
+    toc_point_generation.assign_file_names()
     return toc_points
 
 
-def _count_toc_items(items: list[TocItem]) -> int:
-    count: int = 0
-    for item in items:
-        count += 1 + _count_toc_items(item.children)
-    return count
-
-
-def _max_depth_toc_items(items: list[TocItem]) -> int:
-    max_depth: int = 0
-    for item in items:
-        max_depth = max(
-            max_depth,
-            _max_depth_toc_items(item.children) + 1,
-        )
-    return max_depth
-
-
 class _TocPointGenerator:
-    def __init__(self, chapters_count: int):
+    def __init__(self):
         self._next_order: int = 0
-        self._next_id: int = 1
-        self._digits = len(str(chapters_count))
+        self._refs: list[TocPointRef] = []
 
     def generate(self, toc_item: TocItem) -> TocPoint:
-        return self._create_toc_point(toc_item)
+        # 用显式栈做先序遍历代替递归，子节点逆序入栈以保持原有顺序
+        roots: list[TocPoint] = []
+        stack: list[tuple[TocItem, list[TocPoint]]] = [(toc_item, roots)]
+        while stack:
+            item, siblings = stack.pop()
+            toc_point = self._create_toc_point(item)
+            siblings.append(toc_point)
+            stack.extend(
+                (child, toc_point.children)
+                for child in reversed(item.children)
+            )
+        return roots[0]
+
+    def assign_file_names(self) -> None:
+        # 编号位数取决于目录项总数，需在遍历完成后回填
+        digits = len(str(self._next_order))
+        for i, ref in enumerate(self._refs, start=1):
+            ref.file_name = f"part{i:0{digits}d}.xhtml"
 
     def _create_toc_point(self, toc_item: TocItem) -> TocPoint:
         ref: TocPointRef | None = None
         if toc_item.get_chapter is not None:
-            part_id = self._next_id
-            self._next_id += 1
-            part_id = str(part_id).zfill(self._digits)
             ref = TocPointRef(
-                part_id=part_id,
-                file_name=f"part{part_id}.xhtml",
+                file_name="",
                 get_chapter=toc_item.get_chapter,
             )
+            self._refs.append(ref)
         order = self._next_order # 确保 order 以中序遍历为顺序
         self._next_order += 1
 
         return TocPoint(
-            title=toc_item.title, 
+            title=toc_item.title,
             order=order,
-            ref=ref, 
-            children=[
-                self._create_toc_point(child)
-                for child in toc_item.children
-            ],
+            ref=ref,
+            children=[],
         )
@@ -30,17 +30,7 @@ def serialize_element(element: Element) -> str:
 
     return xml_string
 
-def indent(elem: Element, level: int = 0) -> Element:
-    indent_str = "  " * level
-    next_indent_str = "  " * (level + 1)
-    if len(elem):
-        if not elem.text or not elem.text.strip():
-            elem.text = "\n" + next_indent_str
-        for i, child in enumerate(elem):
-            indent(child, level + 1)
-            if not child.tail or not child.tail.strip():
-                if i == len(elem) - 1:
-                    child.tail = "\n" + indent_str
-                else:
-                    child.tail = "\n" + next_indent_str
-    return elem
+def contains_mathml(xml_string: str) -> bool:
+    # serialize_element always writes MathML with the `m:` prefix, and text content
+    # is escaped, so this tag can only come from a real MathML element
+    return "<m:math" in xml_string
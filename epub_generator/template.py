@@ -11,6 +11,7 @@ def create_env(dir_path: Path) -> Environment:
         autoescape=True,
         trim_blocks=True,
         keep_trailing_newline=True,
+        auto_reload=False,  # templates are package data and never change at runtime
     )
 
 
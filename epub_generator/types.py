@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
+from functools import cache
 from pathlib import Path
 from typing import Callable
 
@@ -24,7 +25,7 @@ class EpubData:
     cover_image_path: Path | None = None
     """Cover image file path (optional, absolute path)"""
 
-@dataclass
+@dataclass(slots=True)
 class BookMeta:
     """Book metadata information."""
 
@@ -57,7 +58,7 @@ class BookMeta:
 # Table of Contents structure
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class TocItem:
     """Table of contents item with title, content, and optional nested children."""
     title: str
@@ -77,13 +78,23 @@ class TextKind(Enum):
     QUOTE = "quote"
     """Quoted text."""
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Mark:
-    """Citation reference marker."""
+    """Citation reference marker (immutable)."""
     id: int
     """Citation ID, matches Footnote.id"""
 
-@dataclass
+    @staticmethod
+    def get(id: int) -> "Mark":  # pylint: disable=redefined-builtin
+        """Shared Mark instance for the given ID, repeated references can reuse it."""
+        return _get_mark(id)
+
+
+@cache
+def _get_mark(id: int) -> Mark:  # pylint: disable=redefined-builtin
+    return Mark(id=id)
+
+@dataclass(slots=True)
 class BasicAsset:
     """Asset as a base class for other assets."""
 
@@ -92,7 +103,7 @@ class BasicAsset:
     caption: list["str | Mark | Formula | HTMLTag"] = field(default_factory=list, kw_only=True)
     """Asset caption (after content)"""
 
-@dataclass
+@dataclass(slots=True)
 class Table(BasicAsset):
     """Table representation."""
 
@@ -100,7 +111,7 @@ class Table(BasicAsset):
     """HTML content of the table"""
 
 
-@dataclass
+@dataclass(slots=True)
 class Formula(BasicAsset):
     """Mathematical formula."""
 
@@ -108,14 +119,14 @@ class Formula(BasicAsset):
     """LaTeX expression"""
 
 
-@dataclass
+@dataclass(slots=True)
 class Image(BasicAsset):
     """Image reference."""
 
     path: Path
     """Absolute path to the image file"""
 
-@dataclass
+@dataclass(slots=True)
 class TextBlock:
     """Text block representation."""
 
@@ -126,7 +137,7 @@ class TextBlock:
     content: list["str | Mark | Formula | HTMLTag"]
     """Text content with optional citation marks."""
 
-@dataclass
+@dataclass(slots=True)
 class Footnote:
     """Footnote/citation section."""
     id: int
@@ -153,7 +164,7 @@ class Chapter:
 
 ChapterGetter = Callable[[], Chapter]
 
-@dataclass
+@dataclass(slots=True)
 class HTMLTag:
     """Generic HTML tag representation."""
 
@@ -1,3 +1,5 @@
+from typing import Iterator, Sequence, Union
+
 from .types import (
     BasicAsset,
     Chapter,
@@ -6,13 +8,20 @@ from .types import (
     Footnote,
     Formula,
     HTMLTag,
-    Image,
     Mark,
     Table,
     TextBlock,
     TocItem,
 )
 
+# Field paths are built as (parent, segment) pairs, segments are attribute names
+# like ".title" or list indexes. They are only joined into a string such as
+# "EpubData.chapters[0].title" when an error is actually reported
+_FieldPath = Union[str, tuple["_FieldPath", str | int]]
+
+# Inline content mixes strings with marks, formulas and HTML tags
+_InlineItem = Union[str, Mark, Formula, HTMLTag]
+
 
 class InvalidUnicodeError(Exception):
     """Raised when invalid Unicode characters (surrogates) are detected in EPUB data."""
@@ -24,11 +33,13 @@ class InvalidUnicodeError(Exception):
             field_path: Dot-separated path to the field containing invalid characters
             invalid_char_info: Information about the invalid character(s)
         """
+        super().__init__(field_path, invalid_char_info)
         self.field_path = field_path
         self.invalid_char_info = invalid_char_info
-        super().__init__(
-            f"Invalid Unicode character detected in {field_path}: {invalid_char_info}"
-        )
+
+    def __str__(self) -> str:
+        # Formatted on demand, callers that catch and discard the error never pay for it
+        return f"Invalid Unicode character detected in {self.field_path}: {self.invalid_char_info}"
 
 
 def validate_epub_data(epub_data: EpubData) -> None:
@@ -48,27 +59,27 @@ def validate_epub_data(epub_data: EpubData) -> None:
     # Check metadata
     if epub_data.meta:
         meta = epub_data.meta
-        _check_string(meta.title, "EpubData.meta.title")
-        _check_string(meta.description, "EpubData.meta.description")
-        _check_string(meta.publisher, "EpubData.meta.publisher")
-        _check_string(meta.isbn, "EpubData.meta.isbn")
+        if meta.title is not None:
+            _check_string(meta.title, "EpubData.meta.title")
+        if meta.description is not None:
+            _check_string(meta.description, "EpubData.meta.description")
+        if meta.publisher is not None:
+            _check_string(meta.publisher, "EpubData.meta.publisher")
+        if meta.isbn is not None:
+            _check_string(meta.isbn, "EpubData.meta.isbn")
 
         for i, author in enumerate(meta.authors):
-            _check_string(author, f"EpubData.meta.authors[{i}]")
+            _check_string(author, ("EpubData.meta.authors", i))
 
         for i, editor in enumerate(meta.editors):
-            _check_string(editor, f"EpubData.meta.editors[{i}]")
+            _check_string(editor, ("EpubData.meta.editors", i))
 
         for i, translator in enumerate(meta.translators):
-            _check_string(translator, f"EpubData.meta.translators[{i}]")
-
-    # Check prefaces TOC
-    for i, preface in enumerate(epub_data.prefaces):
-        _check_toc_item(preface, f"EpubData.prefaces[{i}]")
+            _check_string(translator, ("EpubData.meta.translators", i))
 
-    # Check chapters TOC
-    for i, chapter_toc in enumerate(epub_data.chapters):
-        _check_toc_item(chapter_toc, f"EpubData.chapters[{i}]")
+    # Check prefaces and chapters TOC
+    _check_toc_items(epub_data.prefaces, "EpubData.prefaces")
+    _check_toc_items(epub_data.chapters, "EpubData.chapters")
 
 
 def validate_chapter(chapter: Chapter, context: str = "Chapter") -> None:
@@ -82,15 +93,17 @@ def validate_chapter(chapter: Chapter, context: str = "Chapter") -> None:
         InvalidUnicodeError: If surrogate characters are detected in any string field
     """
     # Check main content elements
+    elements_path = (context, ".elements")
     for i, element in enumerate(chapter.elements):
-        _check_content_block(element, f"{context}.elements[{i}]")
+        _check_content_block(element, (elements_path, i))
 
     # Check footnotes
+    footnotes_path = (context, ".footnotes")
     for i, footnote in enumerate(chapter.footnotes):
-        _check_footnote(footnote, f"{context}.footnotes[{i}]")
+        _check_footnote(footnote, (footnotes_path, i))
 
 
-def _check_string(value: str | None, field_path: str) -> None:
+def _check_string(value: str, field_path: _FieldPath) -> None:
     """Check if a string contains surrogate characters.
 
     Args:
@@ -100,21 +113,26 @@ def _check_string(value: str | None, field_path: str) -> None:
     Raises:
         InvalidUnicodeError: If surrogate characters are detected
     """
-    if value is None:
+    if value.isascii():
         return
 
-    for i, char in enumerate(value):
-        code_point = ord(char)
-        # Check for surrogate pair range (U+D800 to U+DFFF)
-        if 0xD800 <= code_point <= 0xDFFF:
-            raise InvalidUnicodeError(
-                field_path=field_path,
-                invalid_char_info=f"surrogate character U+{code_point:04X} at position {i}",
-            )
+    # Surrogates (U+D800 to U+DFFF) are the only code points UTF-8 cannot encode,
+    # so a strict encode is a C-level scan that also reports the first position
+    try:
+        value.encode("utf-8")
+    except UnicodeEncodeError as error:
+        code_point = ord(value[error.start])
+        raise InvalidUnicodeError(
+            field_path=_format_field_path(field_path),
+            invalid_char_info=f"surrogate character U+{code_point:04X} at position {error.start}",
+        ) from None
+
 
+def _check_inline_content(values: Sequence[_InlineItem], field_path: _FieldPath) -> None:
+    """Check a list that may contain strings, marks, formulas, or HTML tags.
 
-def _check_string_list(values: list[str | Mark | Formula | HTMLTag], field_path: str) -> None:
-    """Recursively check a list that may contain strings, marks, formulas, or HTML tags.
+    Nested HTML tag contents and formula titles and captions are walked with an
+    explicit stack instead of recursion, in the same depth-first order.
 
     Args:
         values: List to check
@@ -123,22 +141,33 @@ def _check_string_list(values: list[str | Mark | Formula | HTMLTag], field_path:
     Raises:
         InvalidUnicodeError: If surrogate characters are detected
     """
-    for i, item in enumerate(values):
-        item_path = f"{field_path}[{i}]"
-        if isinstance(item, str):
-            _check_string(item, item_path)
-        elif isinstance(item, Mark):
-            pass  # Mark only contains int ID
-        elif isinstance(item, Formula):
-            _check_string(item.latex_expression, f"{item_path}.latex_expression")
-            _check_string_list(item.title, f"{item_path}.title")
-            _check_string_list(item.caption, f"{item_path}.caption")
-        elif isinstance(item, HTMLTag):
-            _check_html_tag(item, item_path)
-
-
-def _check_html_tag(tag: HTMLTag, field_path: str) -> None:
-    """Check an HTML tag for invalid characters.
+    stack: list[tuple[_FieldPath, Iterator[tuple[int, _InlineItem]]]] = [(field_path, enumerate(values))]
+    while stack:
+        list_path, items = stack[-1]
+        for i, item in items:
+            if isinstance(item, str):
+                _check_string(item, (list_path, i))
+            elif isinstance(item, Formula):
+                item_path = (list_path, i)
+                _check_string(item.latex_expression, (item_path, ".latex_expression"))
+                # Pushed in reverse so the title is checked before the caption
+                stack.append(((item_path, ".caption"), enumerate(item.caption)))
+                stack.append(((item_path, ".title"), enumerate(item.title)))
+                break
+            elif isinstance(item, HTMLTag):
+                item_path = (list_path, i)
+                _check_html_tag(item, item_path)
+                stack.append(((item_path, ".content"), enumerate(item.content)))
+                break
+            # Mark only contains int ID
+        else:
+            stack.pop()
+
+
+def _check_html_tag(tag: HTMLTag, field_path: _FieldPath) -> None:
+    """Check an HTML tag's name and attributes for invalid characters.
+
+    The tag's content is left to the caller, so nested tags do not recurse.
 
     Args:
         tag: HTML tag to check
@@ -147,16 +176,16 @@ def _check_html_tag(tag: HTMLTag, field_path: str) -> None:
     Raises:
         InvalidUnicodeError: If surrogate characters are detected
     """
-    _check_string(tag.name, f"{field_path}.name")
+    _check_string(tag.name, (field_path, ".name"))
 
+    attributes_path = (field_path, ".attributes")
     for i, (attr_name, attr_value) in enumerate(tag.attributes):
-        _check_string(attr_name, f"{field_path}.attributes[{i}][0]")
-        _check_string(attr_value, f"{field_path}.attributes[{i}][1]")
+        attribute_path = (attributes_path, i)
+        _check_string(attr_name, (attribute_path, 0))
+        _check_string(attr_value, (attribute_path, 1))
 
-    _check_string_list(tag.content, f"{field_path}.content")
 
-
-def _check_basic_asset(asset: BasicAsset, field_path: str) -> None:
+def _check_basic_asset(asset: BasicAsset, field_path: _FieldPath) -> None:
     """Check BasicAsset (and subclasses) for invalid characters.
 
     Args:
@@ -166,20 +195,23 @@ def _check_basic_asset(asset: BasicAsset, field_path: str) -> None:
     Raises:
         InvalidUnicodeError: If surrogate characters are detected
     """
-    _check_string_list(asset.title, f"{field_path}.title")
-    _check_string_list(asset.caption, f"{field_path}.caption")
+    _check_inline_content(asset.title, (field_path, ".title"))
+    _check_inline_content(asset.caption, (field_path, ".caption"))
 
     if isinstance(asset, Formula):
-        _check_string(asset.latex_expression, f"{field_path}.latex_expression")
+        _check_string(asset.latex_expression, (field_path, ".latex_expression"))
     elif isinstance(asset, Table):
-        _check_html_tag(asset.html_content, f"{field_path}.html_content")
-    elif isinstance(asset, Image):
-        pass  # Image only contains Path, no string content to check
+        html_path = (field_path, ".html_content")
+        _check_html_tag(asset.html_content, html_path)
+        _check_inline_content(asset.html_content.content, (html_path, ".content"))
+    # Image only contains Path, no string content to check
 
 
-def _check_content_block(block: ContentBlock, field_path: str) -> None:
+def _check_content_block(block: ContentBlock, field_path: _FieldPath) -> None:
     """Check a content block for invalid characters.
 
+    isinstance() is used so subclassed blocks are checked as their base type.
+
     Args:
         block: Content block to check
         field_path: Path to the field for error reporting
@@ -188,12 +220,12 @@ def _check_content_block(block: ContentBlock, field_path: str) -> None:
         InvalidUnicodeError: If surrogate characters are detected
     """
     if isinstance(block, TextBlock):
-        _check_string_list(block.content, f"{field_path}.content")
-    elif isinstance(block, (Table, Formula, Image)):
+        _check_inline_content(block.content, (field_path, ".content"))
+    elif isinstance(block, BasicAsset):
         _check_basic_asset(block, field_path)
 
 
-def _check_footnote(footnote: Footnote, field_path: str) -> None:
+def _check_footnote(footnote: Footnote, field_path: _FieldPath) -> None:
     """Check a footnote for invalid characters.
 
     Args:
@@ -203,22 +235,42 @@ def _check_footnote(footnote: Footnote, field_path: str) -> None:
     Raises:
         InvalidUnicodeError: If surrogate characters are detected
     """
+    contents_path = (field_path, ".contents")
     for i, content_block in enumerate(footnote.contents):
-        _check_content_block(content_block, f"{field_path}.contents[{i}]")
+        _check_content_block(content_block, (contents_path, i))
+
 
+def _check_toc_items(items: Sequence[TocItem], field_path: _FieldPath) -> None:
+    """Check a list of TOC items and all their descendants for invalid characters.
 
-def _check_toc_item(item: TocItem, field_path: str) -> None:
-    """Recursively check a TOC item for invalid characters.
+    Children are walked with an explicit stack instead of recursion, so deeply
+    nested tables of contents cannot exhaust the call stack. Items are still
+    checked depth-first, each title before its children.
 
     Args:
-        item: TOC item to check
-        field_path: Path to the field for error reporting
+        items: TOC items to check
+        field_path: Path to the list for error reporting
 
     Raises:
         InvalidUnicodeError: If surrogate characters are detected
     """
-    _check_string(item.title, f"{field_path}.title")
-
-    # Check nested children recursively
-    for i, child in enumerate(item.children):
-        _check_toc_item(child, f"{field_path}.children[{i}]")
+    stack: list[tuple[_FieldPath, Iterator[tuple[int, TocItem]]]] = [(field_path, enumerate(items))]
+    while stack:
+        list_path, entries = stack[-1]
+        for i, item in entries:
+            item_path = (list_path, i)
+            _check_string(item.title, (item_path, ".title"))
+            if item.children:
+                stack.append(((item_path, ".children"), enumerate(item.children)))
+                break
+        else:
+            stack.pop()
+
+
+def _format_field_path(field_path: _FieldPath) -> str:
+    segments: list[str] = []
+    while isinstance(field_path, tuple):
+        field_path, segment = field_path
+        segments.append(f"[{segment}]" if isinstance(segment, int) else segment)
+    segments.append(field_path)
+    return "".join(reversed(segments))
@@ -2,6 +2,7 @@ import shutil
 import subprocess
 import unittest
 from pathlib import Path
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
 
 from epub_generator import (
     BookMeta,
@@ -21,6 +22,14 @@ from epub_generator import (
     generate_epub,
 )
 
+# Minimal 1x1 PNG data
+_MINIMAL_PNG = (
+    b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01'
+    b'\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
+    b'\x00\x00\x00\nIDATx\x9cc\x00\x01\x00\x00\x05\x00\x01'
+    b'\r\n-\xb4\x00\x00\x00\x00IEND\xaeB`\x82'
+)
+
 
 class TestGenerateEpub(unittest.TestCase):
     """Smoke tests for EPUB 3.0 generation validated with epubcheck."""
@@ -44,23 +53,11 @@ class TestGenerateEpub(unittest.TestCase):
         """Create test asset files (cover image, test image, etc.)."""
         cls.asset_dir.mkdir(exist_ok=True, parents=True)
 
-        # Minimal 1x1 PNG data
-        png_data = (
-            b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01'
-            b'\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89'
-            b'\x00\x00\x00\nIDATx\x9cc\x00\x01\x00\x00\x05\x00\x01'
-            b'\r\n-\xb4\x00\x00\x00\x00IEND\xaeB`\x82'
-        )
-
-        # Create cover image
-        cover_path = cls.asset_dir / "test_cover.png"
-        if not cover_path.exists():
-            cover_path.write_bytes(png_data)
-
-        # Create test image
-        test_image_path = cls.asset_dir / "test_image.png"
-        if not test_image_path.exists():
-            test_image_path.write_bytes(png_data)
+        # Cover image and test image share the same PNG data
+        for file_name in ("test_cover.png", "test_image.png"):
+            asset_path = cls.asset_dir / file_name
+            if not asset_path.exists():
+                asset_path.write_bytes(_MINIMAL_PNG)
 
     def _run_epubcheck(self, epub_path: Path) -> tuple[bool, str]:
         """Run epubcheck on generated EPUB file.
@@ -310,6 +307,7 @@ class TestGenerateEpub(unittest.TestCase):
                         elements=[
                             TextBlock(kind=TextKind.BODY, level=0, content=["A formula:"]),
                             Formula(latex_expression="x^2 + y^2 = z^2"),
+                            Formula(latex_expression=r"a \& b"),
                         ]
                     ),
                 ),
@@ -323,6 +321,12 @@ class TestGenerateEpub(unittest.TestCase):
         success, output = self._run_epubcheck(output_path)
         self.assertTrue(success, f"epubcheck failed:\n{output}")
 
+        # Both formulas are rendered, including the escaped ampersand
+        with ZipFile(output_path) as epub:
+            chapter_xhtml = epub.read("OEBPS/Text/part1.xhtml").decode("utf-8")
+        self.assertEqual(chapter_xhtml.count("<m:math"), 2)
+        self.assertIn("&amp;", chapter_xhtml)
+
     def test_epub_with_inline_formulas(self):
         """Test EPUB with inline formulas (MathML and SVG)."""
         epub_data = EpubData(
@@ -377,6 +381,10 @@ class TestGenerateEpub(unittest.TestCase):
         success, output = self._run_epubcheck(output_path_svg)
         self.assertTrue(success, f"epubcheck failed for SVG:\n{output}")
 
+        # The SVG renderer's figure must stay out of pyplot, or host plt calls draw onto it
+        import matplotlib.pyplot as plt
+        self.assertEqual(plt.get_fignums(), [])
+
     def test_epub_with_images(self):
         """Test EPUB with embedded images."""
         test_image_path = self.asset_dir / "test_image.png"
@@ -403,6 +411,109 @@ class TestGenerateEpub(unittest.TestCase):
         success, output = self._run_epubcheck(output_path)
         self.assertTrue(success, f"epubcheck failed:\n{output}")
 
+    def test_epub_with_subclassed_blocks(self):
+        """Test that subclasses of content blocks are rendered like their base type."""
+
+        class CustomTextBlock(TextBlock):
+            pass
+
+        class CustomImage(Image):
+            pass
+
+        test_image_path = self.asset_dir / "test_image.png"
+
+        epub_data = EpubData(
+            meta=BookMeta(title="Book with Subclassed Blocks"),
+            chapters=[
+                TocItem(
+                    title="Chapter 1",
+                    get_chapter=lambda: Chapter(
+                        elements=[
+                            CustomTextBlock(kind=TextKind.BODY, level=0, content=["Custom paragraph"]),
+                            CustomImage(path=test_image_path),
+                        ]
+                    ),
+                ),
+            ],
+        )
+
+        output_path = self.temp_dir / "subclassed_blocks.epub"
+        generate_epub(epub_data, output_path)
+
+        success, output = self._run_epubcheck(output_path)
+        self.assertTrue(success, f"epubcheck failed:\n{output}")
+
+        with ZipFile(output_path) as epub:
+            chapter_xhtml = epub.read("OEBPS/Text/part1.xhtml").decode("utf-8")
+        self.assertIn("<p>Custom paragraph</p>", chapter_xhtml)
+        self.assertIn('<img src="../assets/', chapter_xhtml)
+
+    def test_epub_skips_none_in_inline_content(self):
+        """Test that a stray None in inline content is skipped without dropping later items."""
+        test_image_path = self.asset_dir / "test_image.png"
+
+        epub_data = EpubData(
+            meta=BookMeta(title="Book with None Items"),
+            chapters=[
+                TocItem(
+                    title="Chapter 1",
+                    get_chapter=lambda: Chapter(
+                        elements=[
+                            TextBlock(kind=TextKind.BODY, level=0, content=["Before", None, "after"]),  # type: ignore[list-item]
+                            Image(path=test_image_path, caption=["Before", None, "after"]),  # type: ignore[list-item]
+                        ]
+                    ),
+                ),
+            ],
+        )
+
+        output_path = self.temp_dir / "none_inline_items.epub"
+        generate_epub(epub_data, output_path)
+
+        success, output = self._run_epubcheck(output_path)
+        self.assertTrue(success, f"epubcheck failed:\n{output}")
+
+        with ZipFile(output_path) as epub:
+            chapter_xhtml = epub.read("OEBPS/Text/part1.xhtml").decode("utf-8")
+        self.assertIn("<p>Beforeafter</p>", chapter_xhtml)
+        self.assertIn('<div class="asset-caption">Beforeafter</div>', chapter_xhtml)
+
+    def test_epub_compression(self):
+        """Test that text entries are deflated while mimetype and images are stored."""
+        cover_path = self.asset_dir / "test_cover.png"
+        test_image_path = self.asset_dir / "test_image.png"
+
+        epub_data = EpubData(
+            meta=BookMeta(title="Compressed Book"),
+            cover_image_path=cover_path,
+            chapters=[
+                TocItem(
+                    title="Chapter 1",
+                    get_chapter=lambda: Chapter(
+                        elements=[
+                            TextBlock(kind=TextKind.BODY, level=0, content=["An image:"]),
+                            Image(path=test_image_path),
+                        ]
+                    ),
+                ),
+            ],
+        )
+
+        output_path = self.temp_dir / "compression.epub"
+        generate_epub(epub_data, output_path)
+
+        with ZipFile(output_path) as file:
+            infos = file.infolist()
+        self.assertEqual(infos[0].filename, "mimetype")
+        for info in infos:
+            if info.filename == "mimetype" or info.filename.endswith(".png"):
+                self.assertEqual(info.compress_type, ZIP_STORED, info.filename)
+            else:
+                self.assertEqual(info.compress_type, ZIP_DEFLATED, info.filename)
+
+        success, output = self._run_epubcheck(output_path)
+        self.assertTrue(success, f"epubcheck failed:\n{output}")
+
     def test_epub_full_metadata(self):
         """Test EPUB with complete metadata."""
         from datetime import datetime, timezone
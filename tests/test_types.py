@@ -0,0 +1,33 @@
+import unittest
+import weakref
+from dataclasses import FrozenInstanceError
+
+from epub_generator import Chapter, EpubData, Mark
+
+
+class TestTypes(unittest.TestCase):
+    """Tests for behavior of the public data types."""
+
+    def test_containers_support_weakref(self):
+        """Test that Chapter and EpubData can still be weakly referenced."""
+        chapter = Chapter()
+        epub_data = EpubData()
+
+        self.assertIs(weakref.ref(chapter)(), chapter)
+        self.assertIs(weakref.ref(epub_data)(), epub_data)
+
+    def test_mark_get_returns_shared_instance(self):
+        """Test that Mark.get shares one instance per ID, equal to a constructed Mark."""
+        self.assertIs(Mark.get(7), Mark.get(7))
+        self.assertEqual(Mark.get(7), Mark(id=7))
+        self.assertIsNot(Mark.get(7), Mark.get(8))
+
+    def test_mark_is_frozen(self):
+        """Test that Mark fields cannot be reassigned."""
+        mark = Mark.get(7)
+        with self.assertRaises(FrozenInstanceError):
+            mark.id = 8  # type: ignore[misc]
+
+
+if __name__ == "__main__":
+    unittest.main()
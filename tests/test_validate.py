@@ -544,6 +544,63 @@ class TestValidateUnicode(unittest.TestCase):
 
         self.assertIn("CustomContext.elements[0].content[0]", str(cm.exception))
 
+    def test_invalid_title_in_tuple_children(self):
+        """Test that TOC children given as a tuple are still validated."""
+        epub_data = EpubData(
+            chapters=(
+                TocItem(
+                    title="Chapter 1",
+                    children=(TocItem(title=f"Invalid{self.surrogate_char}"),),
+                ),
+            ),
+        )
+
+        with self.assertRaises(InvalidUnicodeError) as cm:
+            validate_epub_data(epub_data)
+
+        self.assertIn("EpubData.chapters[0].children[0].title", str(cm.exception))
+
+    def test_invalid_content_in_tuple_elements(self):
+        """Test that chapter elements and text content given as tuples are still validated."""
+        chapter = Chapter(
+            elements=(
+                TextBlock(
+                    kind=TextKind.BODY,
+                    level=0,
+                    content=("Valid", f"Invalid{self.surrogate_char}"),
+                ),
+            ),
+        )
+
+        with self.assertRaises(InvalidUnicodeError) as cm:
+            validate_chapter(chapter)
+
+        self.assertIn("Chapter.elements[0].content[1]", str(cm.exception))
+
+    def test_invalid_content_in_subclassed_blocks(self):
+        """Test that subclasses of content blocks are still validated."""
+
+        class CustomTextBlock(TextBlock):
+            pass
+
+        class CustomImage(Image):
+            pass
+
+        chapter = Chapter(
+            elements=[
+                CustomTextBlock(kind=TextKind.BODY, level=0, content=["Valid"]),
+                CustomImage(
+                    path=self.test_image_path,
+                    caption=[f"Invalid{self.surrogate_char}"],
+                ),
+            ]
+        )
+
+        with self.assertRaises(InvalidUnicodeError) as cm:
+            validate_chapter(chapter)
+
+        self.assertIn("Chapter.elements[1].caption[0]", str(cm.exception))
+
 
 if __name__ == "__main__":
     unittest.main()